@@ -1,7 +1,22 @@
 """Console-script entry for the Dagster Diagnostic Agent."""
 
-# Re-export the CLI entrypoint so `python -m dagster_diagnostic_agent` and the
-# console script both resolve to the same function.
+import sys
 
-from .agent import main  # noqa: F401 – re-export for convenience
+_USAGE = "Usage: dagster-diagnostic-agent <dagster_run_url> [<dagster_run_url> ...]"
 
+
+# Thin wrapper instead of re-exporting ``.agent.main`` directly: the argument
+# check runs before ``.agent`` – and with it ``openai-agents`` / ``openai`` –
+# is imported, so a bare invocation prints the usage line immediately.
+
+
+def main() -> None:  # noqa: D401 – public CLI entrypoint
+    """Entry point for the dagster-diagnostic-agent CLI script."""
+
+    if len(sys.argv) < 2:
+        print(_USAGE)
+        sys.exit(1)
+
+    from .agent import main as _main
+
+    _main()
@@ -0,0 +1,83 @@
+"""
+Offline stand-ins for the optional ``openai-agents`` dependency.
+
+Only imported when ``agents`` is missing, so environments with the real
+library never load (or compile) this module.
+"""
+
+import functools
+import re
+import types
+from typing import Any, List
+
+
+class _StubMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class Agent:
+    def __init__(self, *, name: str, instructions: str, tools: List[Any]):
+        self.name = name
+        self.instructions = instructions
+        self.tools = {t.__name__: t for t in tools}
+        # One precompiled alternation instead of a substring scan per tool
+        self._tool_re = (
+            re.compile("|".join(re.escape(name) for name in self.tools))
+            if self.tools
+            else None
+        )
+
+    def run(self, prompt: str) -> _StubMessage:  # noqa: D401 – minimal loop
+        token = "Fetch and diagnose errors for "
+        if prompt.startswith(token):
+            run_url = prompt[len(token) :].strip()
+            fetch_fn = self.tools.get("fetch_dagster_logs")
+            diagnose_fn = self.tools.get("diagnose_logs")
+
+            if fetch_fn and diagnose_fn:
+                try:
+                    logs = fetch_fn(run_url)
+                    diagnosis = diagnose_fn(logs)
+                except Exception as exc:  # pragma: no cover
+                    diagnosis = f"Tool execution failed: {exc}"
+                return _StubMessage(str(diagnosis))
+
+        match = self._tool_re.search(prompt) if self._tool_re else None
+        if match:
+            try:
+                result = self.tools[match.group(0)](prompt)
+            except Exception as exc:  # pragma: no cover
+                result = f"Tool execution failed: {exc}"
+            return _StubMessage(str(result))
+
+        return _StubMessage(prompt)
+
+
+class Runner:
+    @staticmethod
+    def run_sync(agent: "Agent", prompt: str):
+        msg = agent.run(prompt)
+        return types.SimpleNamespace(final_output=msg.content)
+
+
+def set_default_openai_key(_: str) -> None:  # noqa: D401 – no-op stub
+    pass
+
+
+def function_tool(*, name_override: "str | None" = None, **_kwargs):  # noqa: D401
+    """Decorator passthrough – only honours ``name_override`` (``Agent`` looks
+    tools up by name)."""
+
+    def _decorator(fn):
+        if name_override is None or name_override == fn.__name__:
+            return fn
+
+        @functools.wraps(fn)
+        def _tool(*args, **kwargs):
+            return fn(*args, **kwargs)
+
+        _tool.__name__ = name_override
+        return _tool
+
+    return _decorator
@@ -2,11 +2,15 @@
 Agent orchestration to fetch and diagnose Dagster Cloud error logs.
 """
 
-# NOTE: This file is identical to the previous implementation in
-# Core CLI / orchestration entrypoint for the package.
+# CLI orchestration: a single run URL is fetched and its diagnosis streamed
+# by calling the tools directly, with the ``openai-agents`` Runner as a
+# time-limited fallback; several URLs are diagnosed concurrently.
 
+import asyncio
 import logging
 import sys
+import threading
+from typing import Iterator, Sequence
 
 # ---------------------------------------------------------------------------
 # Optional dependency: ``openai-agents``
@@ -15,71 +19,109 @@ import sys
 try:
     from agents import Agent, Runner, set_default_openai_key  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover – executed only in test envs
-    import types
-    from typing import Any, List
-
-    class _StubMessage:
-        def __init__(self, content: str):
-            self.content = content
-
-    class Agent:  # type: ignore
-        def __init__(self, *, name: str, instructions: str, tools: List[Any]):
-            self.name = name
-            self.instructions = instructions
-            self.tools = {t.__name__: t for t in tools}
-
-        def run(self, prompt: str) -> _StubMessage:  # noqa: D401 – minimal loop
-            token = "Fetch and diagnose errors for "
-            if prompt.startswith(token):
-                run_url = prompt[len(token) :].strip()
-                fetch_fn = self.tools.get("fetch_dagster_logs")
-                diagnose_fn = self.tools.get("diagnose_logs")
-
-                if fetch_fn and diagnose_fn:
-                    try:
-                        logs = fetch_fn(run_url)
-                        diagnosis = diagnose_fn(logs)
-                    except Exception as exc:  # pragma: no cover
-                        diagnosis = f"Tool execution failed: {exc}"
-                    return _StubMessage(str(diagnosis))
-
-            for tool_name, fn in self.tools.items():
-                if tool_name in prompt:
-                    try:
-                        result = fn(prompt)
-                    except Exception as exc:  # pragma: no cover
-                        result = f"Tool execution failed: {exc}"
-                    return _StubMessage(str(result))
-
-            return _StubMessage(prompt)
-
-    class Runner:  # type: ignore
-        @staticmethod
-        def run_sync(agent: "Agent", prompt: str):
-            msg = agent.run(prompt)
-            return types.SimpleNamespace(final_output=msg.content)
-
-    def set_default_openai_key(_: str) -> None:  # noqa: D401 – no-op stub
-        pass
+    from ._stubs import Agent, Runner, set_default_openai_key
 
 # ---------------------------------------------------------------------------
 # Internal imports
 # ---------------------------------------------------------------------------
 
-from .tools import diagnose_logs, fetch_dagster_logs
-from .config import OPENAI_API_KEY
+from .tools import (
+    _fetch_dagster_logs,
+    diagnose_logs,
+    diagnose_logs_async,
+    diagnose_logs_stream,
+    fetch_dagster_logs,
+)
+from .config import MAX_CONCURRENCY, OPENAI_API_KEY, RUNNER_TIMEOUT_SECS
+from . import _USAGE, dagster_client
 
 # Suppress INFO-level chatter by default
 logging.basicConfig(level=logging.WARNING)
 
 
+def _run_tools_directly(run_url: str) -> Iterator[str]:
+    """Fetch *run_url*'s error logs and stream their diagnosis."""
+
+    logs_text = _fetch_dagster_logs(run_url)
+    if logs_text.startswith(dagster_client.NO_ERRORS_SENTINEL):
+        return iter([logs_text])  # nothing to diagnose – skip the LLM
+    return diagnose_logs_stream(logs_text)
+
+
+def _run_with_timeout(fn, timeout: float, *args):
+    """Return ``fn(*args)``, raising ``TimeoutError`` after *timeout* seconds.
+
+    *fn* runs on a daemon thread, so a call that never returns is abandoned
+    rather than keeping the interpreter alive at exit.
+    """
+
+    outcome: dict = {}
+    done = threading.Event()
+
+    def _target() -> None:
+        # ``Runner.run_sync`` looks up the current event loop, which only the
+        # main thread has by default.
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            outcome["result"] = fn(*args)
+        except BaseException as exc:  # noqa: BLE001 – re-raised in caller
+            outcome["error"] = exc
+        finally:
+            done.set()
+
+    threading.Thread(target=_target, name="agent-runner", daemon=True).start()
+
+    if not done.wait(timeout):
+        raise TimeoutError(f"no result after {timeout}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+async def _diagnose_url(run_url: str) -> str:
+    try:
+        logs_text = await dagster_client.client.fetch_error_logs_async(run_url)
+    except Exception as exc:  # noqa: BLE001 – report per URL, keep going
+        return f"Failed to fetch logs ({exc.__class__.__name__}: {exc})."
+    if logs_text.startswith(dagster_client.NO_ERRORS_SENTINEL):
+        return logs_text
+    return await diagnose_logs_async(logs_text)
+
+
+async def main_many(run_urls: Sequence[str]) -> None:
+    """Fetch and diagnose *run_urls* concurrently, printing each as it finishes.
+
+    A pool of ``MAX_CONCURRENCY`` workers pulls URLs from a queue, so a slot
+    is refilled the moment its run completes – one slow run never holds back
+    a whole batch.
+    """
+
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for run_url in run_urls:
+        queue.put_nowait(run_url)
+
+    async def _worker() -> None:
+        while not queue.empty():
+            run_url = queue.get_nowait()
+            output = await _diagnose_url(run_url)
+            print(f"=== {run_url}\n{output}\n", flush=True)
+
+    await asyncio.gather(*(_worker() for _ in range(min(MAX_CONCURRENCY, len(run_urls)))))
+
+
 def main() -> None:  # noqa: D401 – public CLI entrypoint
     """Entry point for the dagster-diagnostic-agent CLI script."""
 
     if len(sys.argv) < 2:
-        print("Usage: dagster-diagnostic-agent <dagster_run_url>")
+        print(_USAGE)
         sys.exit(1)
 
+    if len(sys.argv) > 2:
+        # Triage several runs at once – network/LLM bound, so run them
+        # concurrently instead of back-to-back.
+        asyncio.run(main_many(sys.argv[1:]))
+        sys.exit(0)
+
     run_url = sys.argv[1]
 
     # ---------------------------------------------------------------------
@@ -94,33 +136,13 @@ def main() -> None:  # noqa: D401 – public CLI entrypoint
     # a short timeout.
     # ---------------------------------------------------------------------
 
-    # ------------------------------------------------------------------
-    # Helper: robustly invoke *possibly wrapped* tool functions.  When the
-    # optional ``openai-agents`` dependency is available, ``@function_tool``
-    # returns a ``FunctionTool`` instance that is **not** directly callable.
-    # We therefore attempt to unwrap the original Python function via common
-    # attribute names used by the library (``fn``, ``_fn``, ``function``, ...).
-    # ------------------------------------------------------------------
-
-    def _call_tool(obj, *args, **kwargs):  # noqa: D401 – helper
-        if callable(obj):
-            return obj(*args, **kwargs)
-
-        for attr in ("fn", "_fn", "function", "_function", "call"):
-            maybe = getattr(obj, attr, None)
-            if callable(maybe):
-                return maybe(*args, **kwargs)
-
-        raise TypeError(f"Tool object of type {type(obj).__name__} is not callable")
-
-    def _run_tools_directly() -> str:  # noqa: D401 – inner helper
-        logs_text = _call_tool(fetch_dagster_logs, run_url)
-        return _call_tool(diagnose_logs, logs_text)
-
     try:
         # Quick path – succeed immediately without touching the Agent Runner.
-        output = _run_tools_directly()
-        print(output)
+        # The diagnosis is streamed so its first sentence is printed as soon
+        # as the model produces it.
+        for chunk in _run_tools_directly(run_url):
+            print(chunk, end="", flush=True)
+        print()
         sys.exit(0)
 
     except Exception as direct_exc:  # noqa: BLE001 – best-effort fallback
@@ -134,8 +156,8 @@ def main() -> None:  # noqa: D401 – public CLI entrypoint
         )
 
     # ------------------------------------------------------------------
-    # Fallback – delegate to openai-agents (may block if underlying issue
-    # persists, but we already attempted the fast path above).
+    # Fallback – delegate to openai-agents.  The Runner may block if the
+    # underlying issue persists, so it gets a hard wall-clock deadline.
     # ------------------------------------------------------------------
 
     set_default_openai_key(OPENAI_API_KEY)
@@ -148,7 +170,18 @@ def main() -> None:  # noqa: D401 – public CLI entrypoint
         tools=[fetch_dagster_logs, diagnose_logs],
     )
 
-    result = Runner.run_sync(agent, f"Fetch and diagnose errors for {run_url}")
+    try:
+        result = _run_with_timeout(
+            Runner.run_sync, RUNNER_TIMEOUT_SECS, agent, f"Fetch and diagnose errors for {run_url}"
+        )
+    except TimeoutError:
+        print(
+            f"LLM runner timed out after {RUNNER_TIMEOUT_SECS}s – no diagnosis available "
+            f"(raise DAGSTER_DIAGNOSTIC_RUNNER_TIMEOUT to wait longer).",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+
     print(result.final_output)
 
     # Explicitly exit to terminate any lingering background processes or threads
@@ -0,0 +1,238 @@
+"""
+Response cache for LLM diagnoses.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Optional, Sequence, Tuple
+
+from .config import DIAGNOSIS_CACHE_DIR, DIAGNOSIS_CACHE_TTL
+
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: str) -> str:
+    """Return a stable hex digest identifying the given prompt components."""
+
+    digest = hashlib.blake2b(digest_size=32)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")  # separator – ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+
+class DiagnosisCache:
+    """Two-tier (memory → disk) cache of diagnoses keyed by prompt hash.
+
+    Dagster logs are immutable once a run has finished, so serving a stale
+    entry is harmless; the TTL only bounds how long results produced by an
+    older prompt/model pairing linger on disk.  A TTL of ``0`` disables expiry.
+
+    Disk writes happen on a background writer thread that drains pending
+    entries in batches, so bulk triage never waits on file I/O; pending writes
+    are flushed when the interpreter exits.
+
+    Like the tools that use it, the cache **never raises** – I/O problems are
+    logged and treated as a miss.
+    """
+
+    def __init__(self, directory: str, ttl: int, max_memory_entries: int = 256):
+        self._dir = directory
+        self._ttl = ttl
+        self._max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Tuple[str, Tuple[float, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------ helpers ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, f"{key}.json")
+
+    def _expired(self, created: float) -> bool:
+        return self._ttl > 0 and time.time() - created > self._ttl
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                data = json.load(fh)
+            return float(data["created"]), str(data["value"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.debug("Ignoring unreadable cache entry %s: %s", key, exc)
+            return None
+
+    def _write(self, key: str, entry: Tuple[float, str]) -> None:
+        created, value = entry
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self._dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"created": created, "value": value}, fh)
+            os.replace(tmp_path, self._path(key))  # atomic on POSIX + Windows
+        except OSError as exc:
+            logger.debug("Could not persist cache entry %s: %s", key, exc)
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Later entries for the same key supersede earlier ones.
+            for key, entry in dict(batch).items():
+                self._write(key, entry)
+            for _ in batch:
+                self._pending.task_done()
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain, name="diagnosis-cache-writer", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.flush)
+
+    # ----------------------------------------------------------- public API
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached diagnosis for *key*, or ``None`` on a miss."""
+
+        with self._lock:
+            entry = self._memory.get(key)
+
+        if entry is None:
+            entry = self._read(key)
+            if entry is None:
+                return None
+
+        if self._expired(entry[0]):
+            with self._lock:
+                self._memory.pop(key, None)
+            return None
+
+        self._remember(key, entry)
+        return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        """Store *value* under *key* in memory (and, asynchronously, on disk)."""
+
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        self._start_writer()
+        self._pending.put((key, entry))
+
+    def flush(self) -> None:
+        """Block until all pending disk writes have completed."""
+
+        if self._writer is not None:
+            self._pending.join()
+
+
+class SemanticIndex:
+    """Brute-force cosine-similarity index mapping log embeddings to cache keys.
+
+    Vectors are L2-normalised on insert so similarity is a plain dot product.
+    They are persisted in a small SQLite table next to the diagnosis cache and
+    loaded into memory on first use; the number of distinct failures a single
+    deployment produces is small enough that a linear scan beats pulling in a
+    vector-search dependency.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.95):
+        self._path = path
+        self._threshold = threshold
+        # key -> vector; keyed like the table so re-adding a key replaces it
+        self._entries: Optional[Dict[str, array]] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ helpers ---
+
+    @staticmethod
+    def _normalise(vector: Sequence[float]) -> array:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return array("f", (x / norm for x in vector))
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        conn = sqlite3.connect(self._path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        return conn
+
+    def _load(self) -> Dict[str, array]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with closing(self._connect()) as conn:
+                    for key, blob in conn.execute("SELECT key, vector FROM embeddings"):
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        self._entries[key] = vector
+            except (OSError, sqlite3.Error) as exc:
+                logger.debug("Could not load semantic index %s: %s", self._path, exc)
+        return self._entries
+
+    # ----------------------------------------------------------- public API
+
+    def nearest(self, vector: Sequence[float]) -> Optional[str]:
+        """Return the key of the most similar entry above the threshold."""
+
+        query = self._normalise(vector)
+        best_key, best_score = None, self._threshold
+
+        with self._lock:
+            for key, candidate in self._load().items():
+                if len(candidate) != len(query):
+                    continue  # embedding model changed – ignore old vectors
+                score = sum(a * b for a, b in zip(query, candidate))
+                if score > best_score:
+                    best_key, best_score = key, score
+
+        return best_key
+
+    def add(self, key: str, vector: Sequence[float]) -> None:
+        """Index *vector* under *key* (in memory and on disk)."""
+
+        normalised = self._normalise(vector)
+        with self._lock:
+            self._load()[key] = normalised
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        (key, normalised.tobytes()),
+                    )
+            except (OSError, sqlite3.Error) as exc:
+                logger.debug("Could not persist embedding %s: %s", key, exc)
+
+
+# Default process-wide caches used by the tools
+diagnosis_cache = DiagnosisCache(DIAGNOSIS_CACHE_DIR, DIAGNOSIS_CACHE_TTL)
+semantic_index = SemanticIndex(os.path.join(DIAGNOSIS_CACHE_DIR, "embeddings.sqlite3"))
@@ -2,8 +2,8 @@
 Configuration for Dagster Diagnostic Agent.
 """
 
-# Configuration logic remains identical to the original package – only the
-# import path has changed to ``dagster_diagnostic_agent``.
+# Every setting is read from the environment (or a ``.env`` file) once, at
+# import time; invalid numeric values fall back to their defaults.
 
 import os
 
@@ -14,16 +14,17 @@ import os
 
 try:
     from dotenv import load_dotenv  # type: ignore
-
-    load_dotenv()
 except ModuleNotFoundError:  # pragma: no cover – optional dependency missing
 
     def load_dotenv(*_args, **_kwargs):  # noqa: D401 – no-op fallback
         return False
 
 
-# Load environment variables from a .env file if present
-load_dotenv()
+# Load environment variables from a .env file if present – once per process;
+# the sentinel survives ``importlib.reload`` since the module dict is reused.
+if not globals().get("_DOTENV_LOADED"):
+    load_dotenv()
+    _DOTENV_LOADED = True
 
 
 # ---------------------------------------------------------------------------
@@ -32,6 +33,13 @@ load_dotenv()
 
 DAGSTER_CLOUD_API_TOKEN = os.environ.get("DAGSTER_CLOUD_API_TOKEN")
 DAGSTER_CLOUD_GRAPHQL_URL = os.environ.get("DAGSTER_CLOUD_GRAPHQL_URL", "/graphql")
+# Comma-separated ``host/deployment`` pairs whose GraphQL clients are warmed up
+# in the background at startup, e.g. ``acme.dagster.cloud/prod``.
+DAGSTER_DEPLOYMENTS = [
+    dep.strip().strip("/")
+    for dep in os.environ.get("DAGSTER_DEPLOYMENTS", "").split(",")
+    if dep.strip()
+]
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
 # Provide obvious placeholders so that importing the module never crashes in
@@ -39,3 +47,75 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
 DAGSTER_CLOUD_API_TOKEN = DAGSTER_CLOUD_API_TOKEN or "DUMMY_DAGSTER_CLOUD_TOKEN"
 OPENAI_API_KEY = OPENAI_API_KEY or "DUMMY_OPENAI_API_KEY"
+
+
+def _int_env(name: str, default: int) -> int:
+    """Return ``$name`` as an int, falling back to *default* on bad input."""
+
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _bool_env(name: str) -> bool:
+    """Return ``True`` when ``$name`` is set to a truthy value (``1``, ``true``…)."""
+
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+# ---------------------------------------------------------------------------
+# Event fetching
+# ---------------------------------------------------------------------------
+
+# Ask the server to drop non-error events (``logsForRun(levels: ...)``).  Off by
+# default: current Dagster schemas lack the argument, so every run would pay
+# for a rejected query before falling back to client-side filtering.
+DAGSTER_SERVER_LEVEL_FILTER = _bool_env("DAGSTER_SERVER_LEVEL_FILTER")
+
+# ---------------------------------------------------------------------------
+# Model routing
+# ---------------------------------------------------------------------------
+
+# Diagnoses run on the primary model and are retried on the fallback model
+# only when the primary answer is unsure or suspiciously short.
+DIAGNOSIS_PRIMARY_MODEL = os.environ.get("DIAGNOSIS_PRIMARY_MODEL", "gpt-4o-mini")
+DIAGNOSIS_FALLBACK_MODEL = os.environ.get("DIAGNOSIS_FALLBACK_MODEL", "gpt-4o")
+
+# ---------------------------------------------------------------------------
+# Diagnosis cache
+# ---------------------------------------------------------------------------
+
+DIAGNOSIS_CACHE_DIR = os.path.expanduser(
+    os.environ.get("DIAGNOSIS_CACHE_DIR", "~/.cache/dagster-diagnosis-agent")
+)
+
+# Seconds before a cached diagnosis is considered stale (``0`` = never).
+DIAGNOSIS_CACHE_TTL = _int_env("DIAGNOSIS_CACHE_TTL", 7 * 24 * 60 * 60)
+
+# Opt-in nearest-neighbour lookup over log embeddings (one extra embedding call
+# per cache miss, but near-duplicate failures then skip the chat completion).
+ENABLE_SEMANTIC_CACHE = _bool_env("ENABLE_SEMANTIC_CACHE")
+
+# ---------------------------------------------------------------------------
+# Concurrency
+# ---------------------------------------------------------------------------
+
+# Upper bound on run URLs fetched / diagnosed in parallel by the CLI.
+MAX_CONCURRENCY = max(1, _int_env("MAX_CONCURRENCY", 8))
+
+# ---------------------------------------------------------------------------
+# Request coalescing
+# ---------------------------------------------------------------------------
+
+# Collect concurrent ``diagnose_logs_async`` calls for a couple of
+# milliseconds and answer them with one batched OpenAI request.
+ENABLE_DYNAMIC_BATCH = _bool_env("ENABLE_DYNAMIC_BATCH")
+
+# ---------------------------------------------------------------------------
+# Agent runner fallback
+# ---------------------------------------------------------------------------
+
+# Wall-clock seconds the CLI waits for the ``openai-agents`` Runner fallback
+# before giving up.
+RUNNER_TIMEOUT_SECS = max(1, _int_env("DAGSTER_DIAGNOSTIC_RUNNER_TIMEOUT", 60))
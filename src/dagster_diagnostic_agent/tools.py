@@ -2,7 +2,97 @@
 Tools exposed by the Dagster Diagnostic Agent.
 """
 
-from .dagster_client import client
+import asyncio
+import json
+import logging
+import re
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .cache import cache_key, diagnosis_cache, semantic_index
+from .config import (
+    DIAGNOSIS_FALLBACK_MODEL,
+    DIAGNOSIS_PRIMARY_MODEL,
+    ENABLE_DYNAMIC_BATCH,
+    ENABLE_SEMANTIC_CACHE,
+    OPENAI_API_KEY,
+)
+from . import dagster_client
+
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Optional dependency: ``openai`` – one client (and HTTP connection pool) per
+# process instead of one per diagnosis, built on first use so that runs which
+# never reach the LLM (cache hits, runs without errors) skip the import.
+# ---------------------------------------------------------------------------
+
+
+def _openai_unavailable(*_args, **_kwargs):
+    # Simulate API failure in offline environment to trigger fallback logic
+    raise RuntimeError("OpenAI API not available in offline environment")
+
+
+async def _async_openai_unavailable(*args, **kwargs):
+    _openai_unavailable(*args, **kwargs)
+
+
+def _stub_client(create):
+    return types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)),
+        embeddings=types.SimpleNamespace(create=create),
+    )
+
+
+_client = None
+# ``AsyncOpenAI`` connections belong to the event loop that opened them, so
+# async clients are kept per loop (and forgotten once their loop is closed).
+_async_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _openai():
+    """Return the process-wide ``OpenAI`` client."""
+
+    global _client
+
+    with _clients_lock:
+        if _client is None:
+            try:
+                from openai import OpenAI  # type: ignore
+            except ModuleNotFoundError:  # pragma: no cover – offline stub
+                _client = _stub_client(_openai_unavailable)
+            else:
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def _async_openai():
+    """Return the ``AsyncOpenAI`` client of the running event loop.
+
+    A second ``asyncio.run`` (or a loop on another thread) gets a client of
+    its own instead of one whose connections are tied to a closed loop – the
+    same re-binding :meth:`_DiagnosisBatcher.submit` does for its queue.
+    """
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            for stale in [other for other in _async_clients if other.is_closed()]:
+                del _async_clients[stale]
+            try:
+                from openai import AsyncOpenAI  # type: ignore
+            except ModuleNotFoundError:  # pragma: no cover – offline stub
+                client = _stub_client(_async_openai_unavailable)
+            else:
+                client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            _async_clients[loop] = client
+    return client
+
 
 # ---------------------------------------------------------------------------
 # Optional dependency: ``openai-agents`` (function_tool decorator)
@@ -11,12 +101,7 @@ from .dagster_client import client
 try:
     from agents import function_tool  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover – offline stub
-
-    def function_tool(**_kwargs):  # noqa: D401 – decorator passthrough
-        def _decorator(fn):
-            return fn
-
-        return _decorator
+    from ._stubs import function_tool
 
 
 # ---------------------------------------------------------------------------
@@ -24,18 +109,526 @@ except ModuleNotFoundError:  # pragma: no cover – offline stub
 # ---------------------------------------------------------------------------
 
 
-@function_tool(
+def _fetch_dagster_logs(run_url: str) -> str:
+    return dagster_client.client.fetch_error_logs(run_url)
+
+
+# ``openai-agents`` wraps the function in a (non-callable) ``FunctionTool`` –
+# the undecorated ``_fetch_dagster_logs`` stays available for direct calls.
+fetch_dagster_logs = function_tool(
     name_override="fetch_dagster_logs",
     description_override="Given a Dagster Cloud run URL, return the raw error logs.",
-)
-def fetch_dagster_logs(run_url: str) -> str:  # noqa: D401 – public tool
-    return client.fetch_error_logs(run_url)
+)(_fetch_dagster_logs)
 
 
 # ---------------------------------------------------------------------------
 # diagnose_logs – OpenAI-backed log analysis (with offline fallback)
 # ---------------------------------------------------------------------------
 
+_UNSURE = "UNSURE"
+
+_SYSTEM_PROMPT = (
+    "You are a seasoned Dagster engineer. "
+    "Diagnose the following error logs and suggest next-steps. "
+    f"If you cannot confidently diagnose the failure, reply with just {_UNSURE}."
+)
+
+# Routes requests sharing our (constant) system prompt to the same OpenAI
+# prompt-cache shard; bump when the prompt changes.
+_PROMPT_CACHE_KEY = "dagster_diagnosis_v1"
+
+# Answers shorter than this are treated as low-confidence as well.
+_MIN_DIAGNOSIS_CHARS = 50
+
+# Part of every cache key – changing either model invalidates old entries.
+_MODEL_ROUTE = f"{DIAGNOSIS_PRIMARY_MODEL}>{DIAGNOSIS_FALLBACK_MODEL}"
+
+_routing_stats = {"diagnosed": 0, "escalated": 0}
+
+_EMBEDDING_MODEL = "text-embedding-3-small"
+
+_MAX_PROMPT_CHARS = 15_000  # guardrail (per request)
+
+# Logs too long for one prompt are summarised window by window first.
+_MAP_SYSTEM_PROMPT = (
+    "You are a seasoned Dagster engineer. "
+    "The following is one window of a longer run log. List the key error "
+    "signatures it contains – exception types, failing ops or assets and "
+    "their messages – one per line. Do not diagnose."
+)
+_MAP_PROMPT_CACHE_KEY = "dagster_condense_v1"
+_WINDOW_CHARS = 8_000
+_MAX_WINDOWS = 16
+_MAP_CONCURRENCY = 4  # parallel window summaries per log (OpenAI rate limits)
+
+# Volatile tokens that differ between otherwise identical failures.
+_UUID_RE = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE
+)
+_ISO_TIMESTAMP_RE = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"
+)
+# Epoch timestamps prefixed to each line by ``DagsterClient.fetch_error_logs``
+_EPOCH_PREFIX_RE = re.compile(r"^\d{10,13}(?:\.\d+)? - ", re.MULTILINE)
+
+
+def _normalize_logs(log_text: str) -> str:
+    """Mask run IDs and timestamps so near-identical failures share a cache key."""
+
+    normalized = _UUID_RE.sub("<UUID>", log_text)
+    normalized = _ISO_TIMESTAMP_RE.sub("<TS>", normalized)
+    return _EPOCH_PREFIX_RE.sub("<TS> - ", normalized)
+
+
+def _collapse_repeats(log_text: str) -> List[str]:
+    """Return the lines of *log_text* with consecutive repeats collapsed.
+
+    Consecutive lines whose message (ignoring the timestamp prefix) starts
+    with the same 120 characters collapse into their first occurrence plus an
+    ``(xN)`` multiplicity.
+    """
+
+    lines: List[str] = []
+    counts: List[int] = []
+    previous = None
+
+    for line in log_text.splitlines():
+        signature = _EPOCH_PREFIX_RE.sub("", line, count=1)[:120]
+        if signature == previous:
+            counts[-1] += 1
+            continue
+        lines.append(line)
+        counts.append(1)
+        previous = signature
+
+    return [line if n == 1 else f"{line} (x{n})" for line, n in zip(lines, counts)]
+
+
+def _trim_oldest(lines: List[str], max_chars: int) -> str:
+    """Join *lines*, dropping the oldest ones until the text fits *max_chars*."""
+
+    size = sum(len(line) + 1 for line in lines)
+    dropped = 0
+    while size > max_chars and dropped < len(lines) - 1:
+        size -= len(lines[dropped]) + 1
+        dropped += 1
+
+    if dropped:
+        lines = [f"... ({dropped} earlier lines omitted)"] + lines[dropped:]
+
+    text = "\n".join(lines)
+    return text[-max_chars:] if len(text) > max_chars else text
+
+
+def _windows(lines: List[str], size: int = _WINDOW_CHARS) -> List[str]:
+    """Group *lines* into newline-joined windows of roughly *size* characters.
+
+    At most ``_MAX_WINDOWS`` windows are returned: the first one – where the
+    root cause usually surfaces – and the most recent ones.
+    """
+
+    windows: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in lines:
+        if current and used + len(line) + 1 > size:
+            windows.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += len(line) + 1
+    if current:
+        windows.append("\n".join(current))
+
+    if len(windows) > _MAX_WINDOWS:
+        windows = windows[:1] + windows[1 - _MAX_WINDOWS :]
+    return windows
+
+
+def _merge_summaries(summaries: Sequence[str], max_chars: int) -> str:
+    """Combine per-window summaries into the text handed to the diagnosis call."""
+
+    lines = [f"# Key error signatures from {len(summaries)} windows of a longer log, oldest first"]
+    for i, summary in enumerate(summaries, 1):
+        lines.append(f"[window {i}/{len(summaries)}]")
+        lines.extend((summary or "").strip().splitlines())
+    return _trim_oldest(lines, max_chars)
+
+
+def _condense_logs(log_text: str, max_chars: int = 12_000) -> str:
+    """Shrink *log_text* before it is sent to the LLM.
+
+    Repeats are collapsed first.  Logs that still exceed *max_chars* are
+    map-reduced instead of truncated: each window is summarised by a separate
+    (parallel) completion and the diagnosis is made from the combined
+    summaries, so early root-cause errors are not lost.  If summarising fails
+    the oldest lines are dropped instead.
+
+    The map round completes before the diagnosis request is sent, so for such
+    logs :func:`diagnose_logs_stream` yields nothing until it is done.
+    """
+
+    lines = _collapse_repeats(log_text)
+    if sum(len(line) + 1 for line in lines) <= max_chars:
+        return "\n".join(lines)
+
+    windows = _windows(lines)
+    try:
+        with ThreadPoolExecutor(max_workers=_MAP_CONCURRENCY) as pool:
+            summaries = list(pool.map(_summarize_window, windows))
+    except Exception as exc:  # noqa: BLE001 – truncation is the fallback
+        logger.info("Summarising %d log windows failed (%s); truncating", len(windows), exc)
+        return _trim_oldest(lines, max_chars)
+
+    return _merge_summaries(summaries, max_chars)
+
+
+async def _condense_logs_async(log_text: str, max_chars: int = 12_000) -> str:
+    """Async counterpart of :func:`_condense_logs`."""
+
+    lines = _collapse_repeats(log_text)
+    if sum(len(line) + 1 for line in lines) <= max_chars:
+        return "\n".join(lines)
+
+    windows = _windows(lines)
+    semaphore = asyncio.Semaphore(_MAP_CONCURRENCY)
+
+    async def _summarize(window: str) -> str:
+        async with semaphore:
+            return await _chat_async(
+                _fence(window),
+                system_prompt=_MAP_SYSTEM_PROMPT,
+                prompt_cache_key=_MAP_PROMPT_CACHE_KEY,
+            )
+
+    try:
+        summaries = await asyncio.gather(*(_summarize(window) for window in windows))
+    except Exception as exc:  # noqa: BLE001 – truncation is the fallback
+        logger.info("Summarising %d log windows failed (%s); truncating", len(windows), exc)
+        return _trim_oldest(lines, max_chars)
+
+    return _merge_summaries(summaries, max_chars)
+
+
+def _embed(text: str) -> Optional[List[float]]:
+    """Return an embedding for *text*, or ``None`` if the call fails."""
+
+    try:
+        response = _openai().embeddings.create(model=_EMBEDDING_MODEL, input=text)
+        return list(response.data[0].embedding)
+    except Exception as exc:  # noqa: BLE001 – semantic cache is best-effort
+        logger.info("Embedding lookup skipped (%s)", exc)
+        return None
+
+
+def _fence(log_text: str, max_chars: int = _MAX_PROMPT_CHARS) -> str:
+    block = f"```\n{log_text}\n```"
+    return block[-max_chars:] if len(block) > max_chars else block
+
+
+def _fallback_diagnosis(log_text: str, exc: Exception) -> str:
+    lowered = log_text.lower()
+    if "duplicate row" in lowered:
+        hint = (
+            "The logs indicate a `Duplicate row detected` database error "
+            "during the snapshot step. Ensure primary keys are unique or "
+            "deduplicate the upstream query."
+        )
+    else:
+        hint = (
+            "An unexpected error occurred during automatic analysis. "
+            "Review the latest ERROR entries in Dagster Cloud for more details."
+        )
+
+    return (
+        f"Automatic OpenAI diagnosis failed ({exc.__class__.__name__}: {exc}).\n"
+        f"{hint}"
+    )
+
+
+def _completion_kwargs(
+    user_prompt: str,
+    model: str,
+    system_prompt: str = _SYSTEM_PROMPT,
+    prompt_cache_key: str = _PROMPT_CACHE_KEY,
+) -> dict:
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0,
+        extra_body={"prompt_cache_key": prompt_cache_key},
+        # Abort requests that exceed 30 seconds to avoid user-visible
+        # hangs when the OpenAI service is under load or network
+        # connectivity is unstable.
+        timeout=30,
+    )
+
+
+def _chat(
+    user_prompt: str,
+    model: str = DIAGNOSIS_PRIMARY_MODEL,
+    system_prompt: str = _SYSTEM_PROMPT,
+    prompt_cache_key: str = _PROMPT_CACHE_KEY,
+) -> str:
+    response = _openai().chat.completions.create(
+        **_completion_kwargs(user_prompt, model, system_prompt, prompt_cache_key)
+    )
+    return response.choices[0].message.content
+
+
+async def _chat_async(
+    user_prompt: str,
+    model: str = DIAGNOSIS_PRIMARY_MODEL,
+    system_prompt: str = _SYSTEM_PROMPT,
+    prompt_cache_key: str = _PROMPT_CACHE_KEY,
+) -> str:
+    response = await _async_openai().chat.completions.create(
+        **_completion_kwargs(user_prompt, model, system_prompt, prompt_cache_key)
+    )
+    return response.choices[0].message.content
+
+
+def _summarize_window(window: str) -> str:
+    return _chat(
+        _fence(window),
+        system_prompt=_MAP_SYSTEM_PROMPT,
+        prompt_cache_key=_MAP_PROMPT_CACHE_KEY,
+    )
+
+
+def _chat_stream(user_prompt: str, model: str) -> Iterator[str]:
+    stream = _openai().chat.completions.create(
+        **_completion_kwargs(user_prompt, model), stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _split_batch_response(content: str, expected: int) -> List[str]:
+    """Parse the ``{"diagnoses": [...]}`` object returned for a batched prompt."""
+
+    body = content.strip()
+    if body.startswith("```"):  # tolerate a fenced JSON reply
+        body = body.strip("`").partition("\n")[2]
+
+    diagnoses = json.loads(body)["diagnoses"]
+    if (
+        not isinstance(diagnoses, list)
+        or len(diagnoses) != expected
+        or not all(isinstance(d, str) for d in diagnoses)
+    ):
+        raise ValueError(f"expected {expected} diagnoses in batched response")
+    return diagnoses
+
+
+def _needs_escalation(diagnosis: Optional[str]) -> bool:
+    return not diagnosis or _UNSURE in diagnosis or len(diagnosis) < _MIN_DIAGNOSIS_CHARS
+
+
+def _unconfident() -> Exception:
+    """Reason reported when the fallback model's answer is unusable too."""
+
+    return RuntimeError(f"{DIAGNOSIS_FALLBACK_MODEL} gave no confident diagnosis either")
+
+
+def _record_routing(diagnosed: int, escalated: int) -> None:
+    _routing_stats["diagnosed"] += diagnosed
+    _routing_stats["escalated"] += escalated
+    if escalated:
+        logger.info(
+            "Escalated %d/%d diagnoses to %s (%.0f%% of %d so far)",
+            escalated,
+            diagnosed,
+            DIAGNOSIS_FALLBACK_MODEL,
+            100 * _routing_stats["escalated"] / _routing_stats["diagnosed"],
+            _routing_stats["diagnosed"],
+        )
+
+
+def _escalate(log_texts: Sequence[str], diagnoses: List[str]) -> List[str]:
+    """Re-run low-confidence primary-model answers on the fallback model."""
+
+    escalated = 0
+    for i, diagnosis in enumerate(diagnoses):
+        if _needs_escalation(diagnosis):
+            diagnoses[i] = _chat(_fence(log_texts[i]), model=DIAGNOSIS_FALLBACK_MODEL)
+            escalated += 1
+
+    _record_routing(len(diagnoses), escalated)
+    return diagnoses
+
+
+def _complete_batch(log_texts: Sequence[str]) -> List[str]:
+    """Diagnose *log_texts* with a single primary-model chat completion.
+
+    Answers the primary model is unsure about are escalated individually.
+    """
+
+    if len(log_texts) == 1:
+        return _escalate(log_texts, [_chat(_fence(log_texts[0]))])
+
+    runs = "\n".join(f"RUN {i}:\n{_fence(text)}" for i, text in enumerate(log_texts, 1))
+    # Keep the instructions identical across batches so they stay part of the
+    # cacheable prompt prefix; only the run count and logs vary.
+    prompt = (
+        "Diagnose each of the following runs separately. "
+        'Reply with a JSON object {"diagnoses": [...]} holding exactly one '
+        "diagnosis string per run, in order.\n"
+        f"{len(log_texts)} runs follow.\n{runs}"
+    )
+
+    content = _chat(prompt)
+    try:
+        diagnoses = _split_batch_response(content, len(log_texts))
+    except (ValueError, KeyError, TypeError) as exc:
+        logger.info("Batched diagnosis unparseable (%s); diagnosing runs individually", exc)
+        diagnoses = [_chat(_fence(text)) for text in log_texts]
+
+    return _escalate(log_texts, diagnoses)
+
+
+def _pack(log_texts: Sequence[str], budget: int = _MAX_PROMPT_CHARS) -> List[List[int]]:
+    """Group indices of *log_texts* so each group's prompt stays within *budget*."""
+
+    groups: List[List[int]] = []
+    used = budget
+    for i, text in enumerate(log_texts):
+        size = min(len(text) + 8, budget)  # + code fence
+        if used + size > budget:
+            groups.append([])
+            used = 0
+        groups[-1].append(i)
+        used += size
+    return groups
+
+
+def _lookup(log_text: str) -> Tuple[Optional[str], str, Optional[List[float]]]:
+    """Return ``(cached diagnosis or None, cache key, embedding)`` for *log_text*."""
+
+    normalized = _normalize_logs(log_text)
+    key = cache_key(_MODEL_ROUTE, _SYSTEM_PROMPT, normalized)
+    cached = diagnosis_cache.get(key)
+
+    embedding = None
+    if cached is None and ENABLE_SEMANTIC_CACHE:
+        embedding = _embed(normalized[-_MAX_PROMPT_CHARS:])
+        similar_key = semantic_index.nearest(embedding) if embedding else None
+        cached = diagnosis_cache.get(similar_key) if similar_key else None
+
+    return cached, key, embedding
+
+
+def _store(key: str, embedding: Optional[List[float]], diagnosis: Optional[str]) -> None:
+    if diagnosis:
+        diagnosis_cache.set(key, diagnosis)
+        if embedding:
+            semantic_index.add(key, embedding)
+
+
+def diagnose_logs_batch(log_texts: Sequence[str]) -> List[str]:
+    """Diagnose several runs' error logs, sharing OpenAI requests between them.
+
+    Cache hits are answered locally; the remaining logs are packed into as few
+    chat completions as the prompt guardrail allows, so the system prompt and
+    round-trip are paid once per batch instead of once per run.  Like
+    :func:`diagnose_logs` this **never raises** – failures yield the offline
+    hint for each affected run.
+    """
+
+    results: List[Optional[str]] = [None] * len(log_texts)
+    pending: List[tuple] = []  # (index, cache key, embedding)
+
+    for i, log_text in enumerate(log_texts):
+        results[i], key, embedding = _lookup(log_text)
+        if results[i] is None:
+            pending.append((i, key, embedding))
+
+    if pending:
+        texts = [_condense_logs(log_texts[i]) for i, _, _ in pending]
+
+        for group in _pack(texts):
+            try:
+                diagnoses = _complete_batch([texts[j] for j in group])
+            except Exception as exc:  # noqa: BLE001  – broad for robustness
+                for j in group:
+                    results[pending[j][0]] = _fallback_diagnosis(log_texts[pending[j][0]], exc)
+                continue
+
+            for j, diagnosis in zip(group, diagnoses):
+                i, key, embedding = pending[j]
+                if _needs_escalation(diagnosis):  # fallback model unsure as well
+                    results[i] = _fallback_diagnosis(log_texts[i], _unconfident())
+                    continue
+                _store(key, embedding, diagnosis)
+                results[i] = diagnosis
+
+    return results  # type: ignore[return-value]
+
+
+def diagnose_logs_stream(log_text: str) -> Iterator[str]:
+    """Yield a diagnosis of *log_text* incrementally, as the model produces it.
+
+    The first few dozen characters of each answer are held back so that an
+    ``UNSURE`` or near-empty primary answer can still be escalated to the
+    fallback model – and one the fallback model is unsure about too replaced
+    by the offline hint – before anything reaches the caller.  Cached
+    diagnoses are yielded in one piece.  Never raises – failures yield the
+    offline hint instead.
+
+    Logs too long for one prompt are condensed first (see
+    :func:`_condense_logs`); that map round precedes the first streamed byte.
+    """
+
+    cached, key, embedding = _lookup(log_text)
+    if cached is not None:
+        yield cached
+        return
+
+    user_prompt = _fence(_condense_logs(log_text))
+    emitted = False
+    escalated = 0
+
+    try:
+        for model in (DIAGNOSIS_PRIMARY_MODEL, DIAGNOSIS_FALLBACK_MODEL):
+            held = True
+            parts: List[str] = []
+
+            for delta in _chat_stream(user_prompt, model):
+                parts.append(delta)
+                if not held:
+                    yield delta
+                elif sum(map(len, parts)) >= _MIN_DIAGNOSIS_CHARS:
+                    if _UNSURE in "".join(parts):
+                        break
+                    held, emitted = False, True
+                    yield "".join(parts)
+
+            if not held:
+                break
+            escalated = 1  # answer was unsure or too short
+    except Exception as exc:  # noqa: BLE001  – broad for robustness
+        if not emitted:
+            yield _fallback_diagnosis(log_text, exc)
+        else:  # part of the answer is out – flag it as incomplete
+            logger.warning("Diagnosis stream interrupted (%s: %s)", exc.__class__.__name__, exc)
+            yield f"\n[diagnosis interrupted: {exc.__class__.__name__}]"
+        return
+
+    _record_routing(1, escalated)
+    if held:  # the fallback model was unsure as well
+        yield _fallback_diagnosis(log_text, _unconfident())
+        return
+
+    # The hold-back only inspects the opening characters, so an ``UNSURE``
+    # further in may already have been streamed.  Keep such answers out of
+    # the cache the other paths share – they would have escalated them.
+    diagnosis = "".join(parts)
+    if not _needs_escalation(diagnosis):
+        _store(key, embedding, diagnosis)
+
 
 @function_tool(
     name_override="diagnose_logs",
@@ -46,75 +639,117 @@ def fetch_dagster_logs(run_url: str) -> str:  # noqa: D401 – public tool
 def diagnose_logs(log_text: str) -> str:  # noqa: D401 – public tool
     """Analyse Dagster log excerpts and suggest next actions.
 
-    The implementation mirrors the previous version but lives under the new
-    package name.  Crucially: **never raise** – always return a string so the
-    agent framework does not prepend an apology message.
+    A single-run call of :func:`diagnose_logs_batch`.  Crucially: **never
+    raise** – always return a string so the agent framework does not prepend
+    an apology message.
+
+    Successful diagnoses are cached (see :mod:`.cache`) so that re-diagnosing
+    the same logs skips the OpenAI round-trip entirely.  The cache key ignores
+    run IDs and timestamps, and with ``ENABLE_SEMANTIC_CACHE=1`` a diagnosis
+    of a sufficiently similar log is reused as well.
     """
 
-    # Import OpenAI or fall back to a stub when offline.
-    try:
-        import openai  # type: ignore
-    except ModuleNotFoundError:  # pragma: no cover – offline stub
-        import types
+    return diagnose_logs_batch([log_text])[0]
 
-        class _StubChoice:
-            def __init__(self, content: str):
-                self.message = types.SimpleNamespace(content=content)
 
-        class _StubChatCompletion:
-            @staticmethod
-            def create(*_args, **_kwargs):
-                # Simulate API failure in offline environment to trigger fallback logic
-                raise RuntimeError("OpenAI API not available in offline environment")
+# ---------------------------------------------------------------------------
+# diagnose_logs_async – coalesces concurrent callers into batched requests
+# ---------------------------------------------------------------------------
 
-        openai = types.ModuleType("openai")  # type: ignore
-        openai.ChatCompletion = _StubChatCompletion  # type: ignore
 
-    from .config import OPENAI_API_KEY
+class _DiagnosisBatcher:
+    """Queue that turns concurrent async diagnoses into ``diagnose_logs_batch`` calls.
 
-    openai.api_key = OPENAI_API_KEY
+    The first queued request opens a window of *max_wait* seconds (or until
+    *max_batch_size* requests arrived); everything collected in that window is
+    diagnosed together and each caller's future receives its own result.
+    Requests arriving while a batch is in flight form the next batch.
+    """
 
-    system_prompt = (
-        "You are a seasoned Dagster engineer. "
-        "Diagnose the following error logs and suggest next-steps."
-    )
-    user_prompt = f"```\n{log_text}\n```"
+    def __init__(self, max_batch_size: int = 16, max_wait: float = 0.002):
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
 
-    MAX_CHARS = 15_000  # guardrail
-    if len(user_prompt) > MAX_CHARS:
-        user_prompt = user_prompt[-MAX_CHARS:]
+    async def submit(self, log_text: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # first use, or a new ``asyncio.run`` loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain())
+
+        future = loop.create_future()
+        await self._queue.put((log_text, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._max_wait
+
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await asyncio.to_thread(diagnose_logs_batch, [t for t, _ in batch])
+            except Exception as exc:  # noqa: BLE001 – hand the error to every caller
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
 
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0,
-            # Abort requests that exceed 30 seconds to avoid user-visible
-            # hangs when the OpenAI service is under load or network
-            # connectivity is unstable.
-            request_timeout=30,
-        )
 
-        return response.choices[0].message.content
+_batcher = _DiagnosisBatcher()
 
+
+async def _diagnose_batched(log_text: str) -> str:
+    return await _batcher.submit(log_text)
+
+
+async def diagnose_logs_async(log_text: str) -> str:
+    """Async counterpart of :func:`diagnose_logs` (never raises either).
+
+    With ``ENABLE_DYNAMIC_BATCH=1`` concurrent callers are coalesced into
+    batched OpenAI requests; otherwise the diagnosis is awaited on the
+    ``AsyncOpenAI`` client without tying up a thread.
+    """
+
+    if ENABLE_DYNAMIC_BATCH:
+        return await _diagnose_batched(log_text)
+
+    if ENABLE_SEMANTIC_CACHE:  # lookup may call the (sync) embeddings API
+        cached, key, embedding = await asyncio.to_thread(_lookup, log_text)
+    else:
+        cached, key, embedding = _lookup(log_text)
+    if cached is not None:
+        return cached
+
+    user_prompt = _fence(await _condense_logs_async(log_text))
+    try:
+        diagnosis = await _chat_async(user_prompt)
+        escalated = _needs_escalation(diagnosis)
+        if escalated:
+            diagnosis = await _chat_async(user_prompt, model=DIAGNOSIS_FALLBACK_MODEL)
     except Exception as exc:  # noqa: BLE001  – broad for robustness
-        lowered = log_text.lower()
-        if "duplicate row" in lowered:
-            hint = (
-                "The logs indicate a `Duplicate row detected` database error "
-                "during the snapshot step. Ensure primary keys are unique or "
-                "deduplicate the upstream query."
-            )
-        else:
-            hint = (
-                "An unexpected error occurred during automatic analysis. "
-                "Review the latest ERROR entries in Dagster Cloud for more details."
-            )
+        return _fallback_diagnosis(log_text, exc)
 
-        return (
-            f"Automatic OpenAI diagnosis failed ({exc.__class__.__name__}: {exc}).\n"
-            f"{hint}"
-        )
+    _record_routing(1, int(escalated))
+    if _needs_escalation(diagnosis):  # the fallback model was unsure as well
+        return _fallback_diagnosis(log_text, _unconfident())
+    _store(key, embedding, diagnosis)
+    return diagnosis
@@ -0,0 +1,78 @@
+"""
+Shared fixtures: an offline OpenAI stand-in and a throwaway diagnosis cache.
+"""
+
+import os
+import tempfile
+import types
+
+# Keep the module-level caches out of the user's home directory – must run
+# before ``dagster_diagnostic_agent.config`` is imported.
+os.environ["DIAGNOSIS_CACHE_DIR"] = tempfile.mkdtemp(prefix="diagnosis-cache-")
+
+import pytest  # noqa: E402
+
+from dagster_diagnostic_agent import tools  # noqa: E402
+from dagster_diagnostic_agent.cache import DiagnosisCache, SemanticIndex  # noqa: E402
+
+
+class FakeOpenAI:
+    """Records chat completion requests and answers them with ``reply(request)``.
+
+    Streamed requests receive the reply in 10-character deltas; ``aio`` is the
+    matching ``AsyncOpenAI``-shaped client sharing the same request log.
+    """
+
+    def __init__(self):
+        self.reply = lambda request: "A diagnosis long enough to pass the confidence check."
+        self.requests: list = []
+        self.chat = types.SimpleNamespace(
+            completions=types.SimpleNamespace(create=self._create)
+        )
+
+        async def _acreate(**kwargs):
+            return self._create(**kwargs)
+
+        self.aio = types.SimpleNamespace(
+            chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=_acreate))
+        )
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        content = self.reply(kwargs)
+        if kwargs.get("stream"):
+            return iter(
+                types.SimpleNamespace(
+                    choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=part))]
+                )
+                for part in (content[i : i + 10] for i in range(0, len(content), 10))
+            )
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))]
+        )
+
+
+def prompt_of(request: dict) -> str:
+    return request["messages"][-1]["content"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    """Give every test an empty diagnosis cache and semantic index."""
+
+    cache = DiagnosisCache(str(tmp_path / "cache"), 0)
+    monkeypatch.setattr(tools, "diagnosis_cache", cache)
+    monkeypatch.setattr(tools, "semantic_index", SemanticIndex(str(tmp_path / "index.sqlite3")))
+    monkeypatch.setattr(tools, "ENABLE_SEMANTIC_CACHE", False)
+    monkeypatch.setattr(tools, "ENABLE_DYNAMIC_BATCH", False)
+    return cache
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Route every OpenAI call made by :mod:`tools` to a :class:`FakeOpenAI`."""
+
+    fake = FakeOpenAI()
+    monkeypatch.setattr(tools, "_openai", lambda: fake)
+    monkeypatch.setattr(tools, "_async_openai", lambda: fake.aio)
+    return fake
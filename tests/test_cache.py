@@ -0,0 +1,21 @@
+from dagster_diagnostic_agent.cache import DiagnosisCache, SemanticIndex
+
+
+def test_diagnosis_cache_persists_to_disk(tmp_path):
+    cache = DiagnosisCache(str(tmp_path), ttl=0)
+    cache.set("key", "diagnosis")
+    cache.flush()
+
+    assert DiagnosisCache(str(tmp_path), ttl=0).get("key") == "diagnosis"
+    assert cache.get("missing") is None
+
+
+def test_semantic_index_replaces_re_added_key(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    index = SemanticIndex(path)
+    index.add("a", [1.0, 0.0])
+    index.add("a", [0.0, 1.0])
+
+    assert index.nearest([1.0, 0.0]) is None
+    assert index.nearest([0.0, 1.0]) == "a"
+    assert SemanticIndex(path).nearest([0.0, 1.0]) == "a"
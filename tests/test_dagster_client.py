@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from dagster_diagnostic_agent import dagster_client
+from dagster_diagnostic_agent.dagster_client import (
+    NO_ERRORS_SENTINEL,
+    DagsterClient,
+    _ErrorLog,
+    _parse_url,
+    _unpack_page,
+)
+
+
+def error(ts: str, message: str, level: str = "ERROR") -> dict:
+    return {"level": level, "timestamp": ts, "message": message}
+
+
+class FakeGraphQLClient:
+    """Serves canned ``logsForRun`` pages and records the requested cursors."""
+
+    def __init__(self, pages):
+        self._pages = pages
+        self.cursors = []
+
+    def _execute(self, query, variables):
+        self.cursors.append(variables["cursor"])
+        return {"logsForRun": self._pages[len(self.cursors) - 1]}
+
+
+# ---------------------------------------------------------------------------
+# URL parsing
+# ---------------------------------------------------------------------------
+
+
+DEPLOYMENT = "https://acme.dagster.cloud/prod"
+
+
+@pytest.mark.parametrize(
+    "run_url, run_id, cache_key",
+    [
+        (f"{DEPLOYMENT}/runs/abc-123", "abc-123", DEPLOYMENT),
+        (f"{DEPLOYMENT}/runs/abc-123/?tab=logs#top", "abc-123", DEPLOYMENT),
+        ("http://localhost:3000/runs/r1", "r1", "http://localhost:3000"),
+    ],
+)
+def test_parse_url(run_url, run_id, cache_key):
+    parsed = _parse_url(run_url)
+    assert (parsed.run_id, parsed.cache_key) == (run_id, cache_key)
+
+
+@pytest.mark.parametrize("run_url", [f"{DEPLOYMENT}/assets/users", f"{DEPLOYMENT}/runs/"])
+def test_parse_url_rejects_urls_without_run_id(run_url):
+    with pytest.raises(ValueError):
+        _parse_url(run_url)
+
+
+# ---------------------------------------------------------------------------
+# Paging
+# ---------------------------------------------------------------------------
+
+
+def test_unpack_page_stops_when_server_reports_no_more_events():
+    events = [error("1", "boom")]
+
+    def page(**fields):
+        return {"logsForRun": {"events": events, "cursor": "c1", **fields}}
+
+    assert _unpack_page(page(hasMore=False)) == (events, None)
+    assert _unpack_page(page(hasMore=True)) == (events, "c1")
+    assert _unpack_page(page()) == (events, "c1")
+    assert _unpack_page({"logsForRun": {"__typename": "RunNotFoundError"}}) == ([], None)
+
+
+@pytest.fixture
+def paged_client(monkeypatch):
+    monkeypatch.setattr(dagster_client, "DAGSTER_SERVER_LEVEL_FILTER", False)
+    gql = FakeGraphQLClient(
+        [
+            {
+                "events": [error("1", "boom"), error("2", "step started", "INFO")],
+                "cursor": "c1",
+                "hasMore": True,
+            },
+            {
+                "events": [error("3", "boom"), error("4", "disk full", "CRITICAL")],
+                "cursor": "c2",
+                "hasMore": False,
+            },
+        ]
+    )
+    client = DagsterClient("token")
+    monkeypatch.setattr(client, "_get_graphql_client", lambda run_url: gql)
+    return client, gql
+
+
+def test_fetch_error_logs_follows_cursor_until_last_page(paged_client):
+    client, gql = paged_client
+
+    logs = client.fetch_error_logs(f"{DEPLOYMENT}/runs/r1")
+
+    assert logs == "1 - boom (x2)\n4 - disk full"
+    assert gql.cursors == [None, "c1"]
+
+
+def test_fetch_error_logs_async_matches_sync(paged_client):
+    client, gql = paged_client
+
+    logs = asyncio.run(client.fetch_error_logs_async(f"{DEPLOYMENT}/runs/r1"))
+
+    assert logs == "1 - boom (x2)\n4 - disk full"
+    assert gql.cursors == [None, "c1"]
+
+
+# ---------------------------------------------------------------------------
+# Error grouping
+# ---------------------------------------------------------------------------
+
+
+def test_error_log_groups_repeats_that_differ_in_volatile_values():
+    log = _ErrorLog()
+    log.add_page(
+        [
+            error("1", "Timed out after 1.5s at 0x7f3a"),
+            error("2", "Timed out after 2.5s at 0x7f4b"),
+        ]
+    )
+    log.add_page(
+        [
+            error("3", "step started", "INFO"),
+            error("4", "Timed out after 3.0s at 0x7f5c"),
+        ]
+    )
+
+    assert log.render("r1") == "1 - Timed out after 1.5s at 0x7f3a (x3)"
+
+
+def test_error_log_keeps_distinct_quoted_variants():
+    log = _ErrorLog()
+    log.add_page(
+        [
+            error("1", "KeyError: 'user_id'"),
+            error("2", "KeyError: 'order_id'"),
+            error("3", "KeyError: 'user_id'"),
+        ]
+    )
+
+    assert log.render("r1") == (
+        "1 - KeyError: 'user_id' (x3; 2 variants)\n    variant: KeyError: 'order_id'"
+    )
+
+
+def test_error_log_without_errors_renders_sentinel():
+    log = _ErrorLog()
+    log.add_page([error("1", "step started", "INFO")])
+
+    assert log.render("r1") == f"{NO_ERRORS_SENTINEL} r1"
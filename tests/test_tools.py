@@ -0,0 +1,210 @@
+import asyncio
+import json
+
+import pytest
+
+from dagster_diagnostic_agent import tools
+from dagster_diagnostic_agent.config import DIAGNOSIS_FALLBACK_MODEL, DIAGNOSIS_PRIMARY_MODEL
+
+from .conftest import prompt_of
+
+GOOD = "The asset failed because its upstream table is missing; re-run the snapshot job."
+UNSURE_LONG = "UNSURE – the excerpt does not show which op raised the error in the first place."
+
+
+def by_model(primary: str, fallback: str):
+    return lambda request: primary if request["model"] == DIAGNOSIS_PRIMARY_MODEL else fallback
+
+
+PATHS = {
+    "batch": lambda log: tools.diagnose_logs_batch([log])[0],
+    "stream": lambda log: "".join(tools.diagnose_logs_stream(log)),
+    "async": lambda log: asyncio.run(tools.diagnose_logs_async(log)),
+}
+
+
+@pytest.fixture(params=sorted(PATHS))
+def diagnose(request):
+    return PATHS[request.param]
+
+
+# ---------------------------------------------------------------------------
+# Batched completions
+# ---------------------------------------------------------------------------
+
+
+def test_split_batch_response_accepts_fenced_json():
+    content = '```json\n{"diagnoses": ["first", "second"]}\n```'
+    assert tools._split_batch_response(content, 2) == ["first", "second"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    ['{"diagnoses": ["only one"]}', '{"diagnoses": ["one", 2]}', '{"answers": []}', "not json"],
+)
+def test_split_batch_response_rejects_malformed_replies(content):
+    with pytest.raises((ValueError, KeyError, TypeError)):
+        tools._split_batch_response(content, 2)
+
+
+def test_complete_batch_diagnoses_all_runs_in_one_request(fake_openai):
+    answers = [f"{GOOD} (run {i})" for i in range(3)]
+    fake_openai.reply = lambda request: json.dumps({"diagnoses": answers})
+
+    assert tools._complete_batch(["log a", "log b", "log c"]) == answers
+    assert len(fake_openai.requests) == 1
+
+
+def test_complete_batch_falls_back_to_per_run_calls(fake_openai):
+    def reply(request):
+        if "Reply with a JSON object" in prompt_of(request):
+            return "Sorry, here are the diagnoses in prose."
+        return f"{GOOD} ({prompt_of(request).splitlines()[1]})"
+
+    fake_openai.reply = reply
+
+    assert tools._complete_batch(["log a", "log b"]) == [f"{GOOD} (log a)", f"{GOOD} (log b)"]
+    assert len(fake_openai.requests) == 3
+
+
+def test_pack_groups_logs_within_budget():
+    assert tools._pack(["x" * 10] * 5, budget=40) == [[0, 1], [2, 3], [4]]
+    assert tools._pack(["x" * 100, "y"], budget=40) == [[0], [1]]
+
+
+# ---------------------------------------------------------------------------
+# Model routing and caching
+# ---------------------------------------------------------------------------
+
+
+def test_unsure_answer_is_escalated_and_cached(fake_openai, diagnose):
+    fake_openai.reply = by_model("UNSURE", GOOD)
+
+    assert diagnose("KeyError: 'user_id'") == GOOD
+    assert [r["model"] for r in fake_openai.requests] == [
+        DIAGNOSIS_PRIMARY_MODEL,
+        DIAGNOSIS_FALLBACK_MODEL,
+    ]
+
+    fake_openai.requests.clear()
+    assert diagnose("KeyError: 'user_id'") == GOOD
+    assert fake_openai.requests == []
+
+
+def test_unsure_fallback_answer_yields_offline_hint(fake_openai, diagnose):
+    fake_openai.reply = by_model(UNSURE_LONG, UNSURE_LONG)
+
+    diagnosis = diagnose("KeyError: 'user_id'")
+
+    assert diagnosis.startswith("Automatic OpenAI diagnosis failed")
+    assert tools._UNSURE not in diagnosis
+    assert tools._lookup("KeyError: 'user_id'")[0] is None
+
+
+def test_cache_key_ignores_run_ids_and_timestamps(fake_openai):
+    first = "1700000000.1 - Run 0b8c6a3e-5d0e-4d47-9f0a-1c2b3d4e5f60 failed"
+    second = "1700009999.5 - Run 7f1e2d3c-4b5a-4968-8776-a5b4c3d2e1f0 failed"
+
+    assert tools.diagnose_logs_batch([first]) == tools.diagnose_logs_batch([second])
+    assert len(fake_openai.requests) == 1
+
+
+def test_window_summaries_use_their_own_prompt_cache_key(fake_openai):
+    fake_openai.reply = lambda request: "KeyError in op load_users"
+    log = "\n".join(f"1700000000 - error {i}: " + "x" * 200 for i in range(100))
+
+    condensed = tools._condense_logs(log)
+
+    assert "[window 1/" in condensed
+    assert {r["extra_body"]["prompt_cache_key"] for r in fake_openai.requests} == {
+        "dagster_condense_v1"
+    }
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+
+def test_stream_yields_confident_answer_incrementally(fake_openai):
+    fake_openai.reply = by_model(GOOD, "unused")
+
+    chunks = list(tools.diagnose_logs_stream("boom"))
+
+    assert "".join(chunks) == GOOD
+    assert len(chunks[0]) >= tools._MIN_DIAGNOSIS_CHARS
+    assert len(chunks) > 1
+
+
+def test_stream_holds_back_unsure_primary_answer(fake_openai):
+    fake_openai.reply = by_model(UNSURE_LONG, GOOD)
+
+    assert "".join(tools.diagnose_logs_stream("boom")) == GOOD
+
+
+def test_interrupted_stream_is_marked_and_not_cached(fake_openai, monkeypatch):
+    def broken_stream(user_prompt, model):
+        yield GOOD
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(tools, "_chat_stream", broken_stream)
+
+    diagnosis = "".join(tools.diagnose_logs_stream("boom"))
+
+    assert diagnosis == f"{GOOD}\n[diagnosis interrupted: ConnectionError]"
+    assert tools._lookup("boom")[0] is None
+
+
+# ---------------------------------------------------------------------------
+# Async diagnoses
+# ---------------------------------------------------------------------------
+
+
+def test_batcher_returns_results_in_submission_order(monkeypatch):
+    batches = []
+
+    def fake_batch(log_texts):
+        batches.append(list(log_texts))
+        return [text.upper() for text in log_texts]
+
+    monkeypatch.setattr(tools, "diagnose_logs_batch", fake_batch)
+    batcher = tools._DiagnosisBatcher(max_batch_size=4, max_wait=0.05)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(f"log {i}") for i in range(6)))
+
+    assert asyncio.run(submit_all()) == [f"LOG {i}" for i in range(6)]
+    assert batches == [[f"log {i}" for i in range(4)], ["log 4", "log 5"]]
+
+    # A later ``asyncio.run`` gets a fresh queue and worker on its own loop
+    assert asyncio.run(submit_all()) == [f"LOG {i}" for i in range(6)]
+
+
+def test_batcher_hands_errors_to_every_caller(monkeypatch):
+    def failing_batch(log_texts):
+        raise RuntimeError("batch failed")
+
+    monkeypatch.setattr(tools, "diagnose_logs_batch", failing_batch)
+    batcher = tools._DiagnosisBatcher(max_wait=0.05)
+
+    async def submit_all():
+        return await asyncio.gather(
+            *(batcher.submit(f"log {i}") for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(submit_all())
+
+    assert all(isinstance(r, RuntimeError) and str(r) == "batch failed" for r in results)
+
+
+def test_async_client_is_created_per_event_loop(monkeypatch):
+    monkeypatch.setattr(tools, "_async_clients", {})
+
+    async def current_client():
+        return tools._async_openai()
+
+    first = asyncio.run(current_client())
+    second = asyncio.run(current_client())
+
+    assert first is not second
+    assert len(tools._async_clients) == 1  # the closed loop's client is dropped